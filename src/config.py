@@ -3,6 +3,8 @@ DATA_DIR = "data"
 DOCS_DIR = f"{DATA_DIR}/docs"
 CHROMA_PATH = "data/chroma_db"
 QUESTIONS_FILE = "data/questions.json"
+GROUND_TRUTH_FILE = "data/ground_truth.json"
+THROUGHPUT_FILE = "data/batch_throughput.json"
 RESULTS_FILE = "data/results-final.json"
 
 # Models
@@ -12,30 +14,37 @@ AVAILABLE_CHAT_MODELS = {
     "qwen": {  # Tiny model
         "repo": "Qwen/Qwen2.5-1.5B-Instruct-GGUF",
         "filename": "qwen2.5-1.5b-instruct-q4_k_m.gguf",
+        "memory_mb": 1200,
     },
     "gemma": {  # Good average score
         "repo": "bartowski/gemma-2-2b-it-GGUF",
         "filename": "gemma-2-2b-it-Q4_K_M.gguf",
+        "memory_mb": 1950,
     },
     "llama": {  # Llama tiny model
         "repo": "bartowski/Llama-3.2-1B-Instruct-GGUF",
         "filename": "Llama-3.2-1B-Instruct-Q4_K_M.gguf",
+        "memory_mb": 900,
     },
     "phi": {  # Larger model
         "repo": "microsoft/Phi-3-mini-4k-instruct-gguf",
         "filename": "Phi-3-mini-4k-instruct-q4.gguf",
+        "memory_mb": 3200,
     },
     "exaone": {  # Best IFEval score
         "repo": "lmstudio-community/EXAONE-3.5-2.4B-Instruct-GGUF",
         "filename": "EXAONE-3.5-2.4B-Instruct-Q4_K_M.gguf",
+        "memory_mb": 1900,
     },
     "benchmaxx": {  # Best BBH score
         "repo": "mradermacher/Benchmaxx-Llama-3.2-1B-Instruct-GGUF",
         "filename": "Benchmaxx-Llama-3.2-1B-Instruct.Q4_K_M.gguf",
+        "memory_mb": 900,
     },
     "granite": {  # Good average score
         "repo": "bartowski/granite-3.1-2b-instruct-GGUF",
         "filename": "granite-3.1-2b-instruct-Q4_K_M.gguf",
+        "memory_mb": 1900,
     },
 }
 
@@ -43,10 +52,12 @@ AVAILABLE_RERANK_MODELS = {
     "bge": {
         "repo": "BAAI/bge-reranker-v2-m3",
         "score_threshold": 0.03,
+        "memory_mb": 2300,
     },
     "ms-marco": {
         "repo": "cross-encoder/ms-marco-MiniLM-L-6-v2",
         "score_threshold": -8,
+        "memory_mb": 100,
     },
 }
 
@@ -55,18 +66,46 @@ DEFAULT_RERANK_MODEL = "bge"
 
 EMBEDDING_MODEL_NAME = "sentence-transformers/all-mpnet-base-v2"
 
+# Memory budget (approximate resident memory, in MB)
+# Chat models: GGUF weights + 2048-token KV cache. Rerankers and embedder: fp32 weights.
+EMBEDDING_MEMORY_MB = 450
+MEMORY_BASE_MB = 700  # Python, torch, Chroma and the BM25 index
+
 JUDGE_MODEL_NAME = "gemini-2.5-flash"
 
+# Hot reload
+WATCH_INTERVAL = 2.0  # Seconds between two polls of the docs directory
+
 # Chunking strategy
 CHUNK_SIZE = 800  # Document-as-Chunk approach, for capturing context
 CHUNK_OVERLAP = 150
 
+# BM25
+BM25_STEMMING = True  # Plural stripping in the shared tokenizer ("modes" -> "mode")
+
 # RAG parameters
 MAX_TOKENS = 1024
 MAX_TOKENS_SAFE = 1000  # Buffer for safety
 TOP_K_RERANK = 3  # Number of documents to keep after reranking
 DOC_SEPARATOR = "\n\n---\n\n"
 
+# Adaptive retrieval (early exit reranking)
+VECTOR_TOP_K = 20  # Number of vector candidates in the default (fixed) mode
+ADAPTIVE_K_INITIAL = 8  # First vector fetch in adaptive mode
+ADAPTIVE_K_MAX = 40  # Upper bound when widening k
+ADAPTIVE_RERANK_STEP = 4  # Candidates cross-encoded per increment
+# Heuristic vector relevance cutoff (langchain relevance for Chroma's L2 distance).
+# Tune it from the "Lowest vector relevance of a selected chunk" of a fixed mode batch run (-v)
+ADAPTIVE_MIN_RELEVANCE = 0.2
+
+# Extractive context compression
+COMPRESSION_TOP_K = 6  # Reranked candidates considered, as compressed chunks leave room for more sources
+COMPRESSION_MIN_TOKENS = 120  # Smaller chunks are kept as-is
+
+# Conversation (multi-turn chat)
+HISTORY_MAX_TOKENS = 200  # Slice of the context budget reserved for the history
+HISTORY_ANSWER_TOKENS = 60  # Answers are summarized to their first sentences within this limit
+
 # Prompts
 STRICT_TEMPLATE = """### INSTRUCTION
 You are a strict technical assistant for ZentroSoft. 
@@ -86,6 +125,11 @@ You answer questions based SOLELY on the context below.
 ### ANSWER
 """
 
+HISTORY_FORMAT = """Previous conversation (for reference only, not a source of facts):
+{history}
+
+{context}"""
+
 JUDGE_TEMPLATE = """
 You are an expert evaluator for a Retrieval-Augmented Generation (RAG) system.
 Your task is to evaluate the quality of a generated answer compared to a ground truth answer, taking into account the actual context retrieved by the system.
@@ -0,0 +1,159 @@
+import re
+from collections import deque
+
+import config
+import text_processing
+import utils
+
+# Pronouns and reference cues to an earlier turn ("what about step 3?", "how long does it take?")
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|there|step \d+|what about|how about|"
+    r"also|same|previous|above)\b",
+    re.IGNORECASE,
+)
+STOP_WORDS = {
+    "what", "about", "which", "when", "where", "does", "with", "from", "that",
+    "this", "these", "those", "there", "then", "also", "same", "step", "steps",
+    "how", "the", "and", "for", "are", "was", "were", "can", "should", "would",
+    "could", "have", "has", "into", "more", "tell", "explain", "previous", "above",
+    "its", "they", "them", "is", "it", "a", "an", "of", "to", "in", "on", "do", "i",
+}
+# Compared with the same tokenizer as the questions and the context
+STOP_TOKENS = set(text_processing.tokenize(" ".join(STOP_WORDS)))
+
+
+class Conversation:
+    """
+    Multi-turn chat on top of a RAGPipeline, with a rolling token-budgeted history.
+    Follow-up questions reuse the previous context when it covers them, and are otherwise
+    expanded with the question that started the topic. Everything is incremental
+    (no extra LLM call, token counts computed once per turn), so latency stays flat.
+    """
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+        # (question, summarized answer, tokens) of the turns kept in the history
+        self.turns = deque()
+        self.history_tokens = 0
+        # Question that started the current topic (follow-up expansions are never chained)
+        self.topic_query = None
+        self.last_docs = []
+
+        # Fixed overhead of the history block in the prompt
+        self.history_overhead = pipeline.llm.get_num_tokens(
+            config.HISTORY_FORMAT.format(history="", context="")
+        )
+
+    def reset(self):
+        """Forgets the conversation."""
+        self.turns.clear()
+        self.history_tokens = 0
+        self.topic_query = None
+        self.last_docs = []
+
+    @staticmethod
+    def content_tokens(text):
+        """Whole-word tokens of a text, without stop words."""
+        return set(text_processing.tokenize(text)) - STOP_TOKENS
+
+    def context_tokens(self):
+        return self.content_tokens(
+            " ".join(doc.page_content for doc in self.last_docs)
+        )
+
+    def is_follow_up(self, question):
+        """
+        A follow-up refers to an earlier turn (pronoun or reference cue)
+        and does not introduce a new topic: all its content words are already
+        in the topic question or the previous context.
+        """
+        if self.topic_query is None or FOLLOW_UP_PATTERN.search(question) is None:
+            return False
+        known = self.content_tokens(self.topic_query) | self.context_tokens()
+        return self.content_tokens(question) <= known
+
+    def covered_by_context(self, question):
+        """The previous context covers the question if it contains all its content words."""
+        return self.content_tokens(question) <= self.context_tokens()
+
+    def history(self):
+        """Formats the history kept in the budget."""
+        return "\n".join(
+            f"User: {question}\nAssistant: {answer}"
+            for question, answer, _ in self.turns
+        )
+
+    def ask(self, question):
+        """
+        Answers a question in the context of the conversation.
+        """
+        pipeline = self.pipeline
+        history = self.history()
+
+        # The history has a fixed slice of the context budget, held back from the first turn on:
+        # the docs selected now may be reused by a follow-up, next to the history
+        token_budget = config.MAX_TOKENS_SAFE - config.HISTORY_MAX_TOKENS
+
+        # 1. Retrieve docs (or reuse them)
+        follow_up = self.is_follow_up(question)
+        if follow_up and self.last_docs and self.covered_by_context(question):
+            selected_docs = self.last_docs
+            if pipeline.verbose:
+                print("    Follow-up on the same topic: reusing previous context")
+        else:
+            if follow_up:
+                # Expand with the question that started the topic, never with a previous expansion
+                query = f"{self.topic_query} {question}"
+                if pipeline.verbose:
+                    print(f"    Follow-up: expanded query: {query}")
+            else:
+                # New topic
+                query = question
+                self.topic_query = question
+            selected_docs = pipeline.retrieve_context(
+                query, token_budget=token_budget
+            )
+
+        # 2. Generate
+        answer = pipeline.generate_answer(question, selected_docs, history=history)
+
+        # 3. Update the conversation state
+        self.last_docs = selected_docs
+        self._add_turn(question, answer)
+
+        return {
+            "answer": answer,
+            "context": [doc.metadata["source"] for doc in selected_docs],
+        }
+
+    def _add_turn(self, question, answer):
+        """
+        Adds a turn to the history, summarizing the answer to its first sentences,
+        and drops the oldest turns to stay within the history budget.
+        """
+        summary = ""
+        for sentence in utils.SENTENCE_END_PATTERN.split(" ".join(answer.split())):
+            candidate = f"{summary} {sentence}".strip()
+            if (
+                summary
+                and self.pipeline.llm.get_num_tokens(candidate)
+                > config.HISTORY_ANSWER_TOKENS
+            ):
+                break
+            summary = candidate
+
+        # A single sentence can still be too long (e.g. a list of steps)
+        if self.pipeline.llm.get_num_tokens(summary) > config.HISTORY_ANSWER_TOKENS:
+            words = summary.split()[: config.HISTORY_ANSWER_TOKENS * 3 // 4]
+            summary = " ".join(words) + "..."
+
+        tokens = self.pipeline.llm.get_num_tokens(
+            f"User: {question}\nAssistant: {summary}\n"
+        )
+        self.turns.append((question, summary, tokens))
+        self.history_tokens += tokens
+
+        budget = config.HISTORY_MAX_TOKENS - self.history_overhead
+        while self.turns and self.history_tokens > budget:
+            _, _, dropped_tokens = self.turns.popleft()
+            self.history_tokens -= dropped_tokens
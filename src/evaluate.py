@@ -6,6 +6,7 @@ from google import genai
 from dotenv import load_dotenv
 
 import config
+from text_processing import read_text
 from utils import load_json
 
 
@@ -99,8 +100,7 @@ def main():
         for filename in os.listdir(config.DOCS_DIR):
             if filename.endswith(".md"):
                 path = os.path.join(config.DOCS_DIR, filename)
-                with open(path, "r", encoding="latin-1") as f:
-                    source_contents[path] = f.read()
+                source_contents[path] = read_text(path)
 
     print(f'\nEvaluating answers using "{config.JUDGE_MODEL_NAME}":\n')
 
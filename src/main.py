@@ -1,7 +1,10 @@
 import argparse
 import config
+import memory
 import utils
-from rag import RAGPipeline
+from conversation import Conversation
+from rag import RAGPipeline, run_batch_parallel
+from watcher import DocsWatcher
 from termcolor import colored, cprint
 
 
@@ -37,6 +40,38 @@ def main():
         default="",
         help="Output JSON file for batch results",
     )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Enable adaptive retrieval depth (incremental reranking with early exit)",
+    )
+    parser.add_argument(
+        "--compress",
+        action="store_true",
+        help="Enable extractive context compression (keeps relevant sentences, list items and whole procedures)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Batch/rerank modes: number of worker processes, each with its own share of the CPU cores",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Chat mode: hot reload the index when files in the docs directory change",
+    )
+    parser.add_argument(
+        "--multi-turn",
+        action="store_true",
+        help="Chat mode: answer follow-up questions using the conversation history",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=None,
+        help="Memory budget in MB: picks smaller models if needed and unloads the embedder/reranker between stages",
+    )
     parser.add_argument(
         "-v",
         "--verbose",
@@ -47,6 +82,28 @@ def main():
 
     args = parser.parse_args()
 
+    if args.workers is not None:
+        if args.mode == "chat":
+            parser.error("--workers is only available in batch and rerank modes")
+        if args.workers < 1:
+            parser.error("--workers must be at least 1")
+
+    # Memory budget: pick the models fitting in it
+    models_budget_mb = None
+    if args.memory_budget is not None:
+        try:
+            chat_model, rerank_model, models_budget_mb = memory.plan_models(
+                args.memory_budget, args.model, args.reranker
+            )
+        except RuntimeError as e:
+            parser.error(f"--memory-budget: {e}")
+        if (chat_model, rerank_model) != (args.model, args.reranker):
+            cprint(
+                f"Memory budget of {args.memory_budget} MB: using {chat_model} and {rerank_model}",
+                "yellow",
+            )
+        args.model, args.reranker = chat_model, rerank_model
+
     # Chat model: Download if needed and get path
     model_path = utils.ensure_model_exists(args.model)
 
@@ -57,13 +114,21 @@ def main():
 
     verbose = args.verbose if args.verbose is not None else args.mode != "chat"
 
+    pipeline_kwargs = {
+        "model_path": model_path,
+        "embedding_model_name": config.EMBEDDING_MODEL_NAME,
+        "rerank_config": config.AVAILABLE_RERANK_MODELS[args.reranker],
+        "adaptive_retrieval": args.adaptive,
+        "compress_context": args.compress,
+        "models_budget_mb": models_budget_mb,
+    }
+
+    # Multi-process batch: each worker loads its own pipeline
+    parallel = args.mode != "chat" and args.workers is not None
+
     # Initialize pipeline
-    rag = RAGPipeline(
-        model_path=model_path,
-        embedding_model_name=config.EMBEDDING_MODEL_NAME,
-        rerank_config=config.AVAILABLE_RERANK_MODELS[args.reranker],
-        verbose=verbose,
-    )
+    if not parallel:
+        rag = RAGPipeline(verbose=verbose, **pipeline_kwargs)
 
     if args.mode != "chat":
         if len(args.output) == 0:
@@ -84,14 +149,34 @@ def main():
                 attrs=["bold"],
             )
 
-        rag.run_batch(config.QUESTIONS_FILE, output, answer=args.mode == "batch")
+        if parallel:
+            run_batch_parallel(
+                config.QUESTIONS_FILE,
+                output,
+                workers=args.workers,
+                answer=args.mode == "batch",
+                verbose=verbose,
+                **pipeline_kwargs,
+            )
+        else:
+            rag.run_batch(config.QUESTIONS_FILE, output, answer=args.mode == "batch")
 
     else:
         print("\n" + colored("=" * 50, "green"))
         cprint("ZentroSoft Technical Assistant", "green", attrs=["bold"])
         cprint("Type 'exit' or 'quit' to stop.", "dark_grey")
+        conversation = None
+        if args.multi_turn:
+            conversation = Conversation(rag)
+            cprint("Multi-turn mode: type 'reset' to start a new topic.", "dark_grey")
         print(colored("=" * 50, "green") + "\n")
 
+        watcher = None
+        if args.watch:
+            watcher = DocsWatcher(rag, verbose=verbose)
+            watcher.start()
+            cprint(f"Watching {config.DOCS_DIR} for changes.", "dark_grey")
+
         while True:
             try:
                 user_input = input(colored("You: ", "blue", attrs=["bold"]))
@@ -102,7 +187,14 @@ def main():
                 if not user_input.strip():
                     continue
 
-                rag.answer_question(user_input)
+                if conversation:
+                    if user_input.lower() == "reset":
+                        conversation.reset()
+                        cprint("Conversation reset.", "dark_grey")
+                        continue
+                    conversation.ask(user_input)
+                else:
+                    rag.answer_question(user_input)
 
             except KeyboardInterrupt:
                 cprint("\nGoodbye!", "cyan")
@@ -110,6 +202,12 @@ def main():
             except Exception as e:
                 cprint(f"\nError: {e}", "red")
 
+        if watcher:
+            watcher.stop()
+
+        if models_budget_mb is not None:
+            rag.print_memory_report()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,260 @@
+import ctypes
+import gc
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from langchain_core.embeddings import Embeddings
+import config
+
+
+def current_rss_mb():
+    """Returns the resident memory of the process (MB)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+    except (OSError, ValueError):
+        # No procfs (e.g. macOS): fall back to the peak RSS
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    """Returns the peak resident memory of the process (MB)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS, in KB on Linux
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def reset_peak_rss():
+    """Resets the peak RSS (Linux only). Returns whether it was reset."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def release_memory():
+    """Collects garbage and gives freed heap memory back to the OS (glibc only)."""
+    gc.collect()
+    try:
+        ctypes.CDLL("libc.so.6").malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+
+
+def plan_models(budget_mb, chat_model, rerank_model):
+    """
+    Picks the models fitting in the memory budget.
+    Models are kept when they fit together, or when the LLM plus the largest of
+    the embedder and the reranker fit (the LRU manager then swaps them between stages).
+    Otherwise smaller variants are picked, the reranker first, then the chat model.
+    Returns (chat model, rerank model, budget for the managed models in MB).
+    """
+
+    def chat_memory(key):
+        return config.AVAILABLE_CHAT_MODELS[key]["memory_mb"]
+
+    def rerank_memory(key):
+        return config.AVAILABLE_RERANK_MODELS[key]["memory_mb"]
+
+    def fits(chat, rerank):
+        # Embedder and reranker are never needed at the same time
+        models_budget = budget_mb - config.MEMORY_BASE_MB - chat_memory(chat)
+        return models_budget >= max(config.EMBEDDING_MEMORY_MB, rerank_memory(rerank))
+
+    smallest_rerank = min(config.AVAILABLE_RERANK_MODELS, key=rerank_memory)
+    smallest_chat = min(config.AVAILABLE_CHAT_MODELS, key=chat_memory)
+
+    for chat, rerank in (
+        (chat_model, rerank_model),
+        (chat_model, smallest_rerank),
+        (smallest_chat, smallest_rerank),
+    ):
+        if fits(chat, rerank):
+            break
+    else:
+        raise RuntimeError(
+            f"Memory budget of {budget_mb} MB is too small, even for the smallest models"
+        )
+
+    return chat, rerank, budget_mb - config.MEMORY_BASE_MB - chat_memory(chat)
+
+
+class ModelManager:
+    """
+    Loads models on demand and keeps them within a memory budget,
+    unloading the least recently used ones. Load counts and times are tracked,
+    to show the trade-off between reload latency and memory.
+    Thread-safe: models are pinned while in use (e.g. the hot reload thread embedding
+    while the main thread reranks), and are never unloaded until released.
+    """
+
+    def __init__(self, budget_mb=None, verbose=False):
+        self.budget_mb = budget_mb  # None: no limit, models stay resident
+        self.verbose = verbose
+        self.loaders = {}
+        self.loaded = OrderedDict()  # Least recently used first
+        self.in_use = {}
+        self.loads = {}
+        self.load_seconds = {}
+        self.condition = threading.Condition()
+
+    def register(self, name, loader, memory_mb):
+        """Registers a model loader with its estimated memory footprint."""
+        self.loaders[name] = (loader, memory_mb)
+        self.in_use[name] = 0
+        self.loads[name] = 0
+        self.load_seconds[name] = 0.0
+
+    def resident_mb(self):
+        return sum(self.loaders[name][1] for name in self.loaded)
+
+    @contextmanager
+    def use(self, name):
+        """
+        Yields the model, loading it (and unloading others) if needed.
+        The model cannot be unloaded until the block exits.
+        """
+        with self.condition:
+            model = self._load(name)
+            self.in_use[name] += 1
+        try:
+            yield model
+        finally:
+            with self.condition:
+                self.in_use[name] -= 1
+                # Threads waiting for room may now unload it
+                self.condition.notify_all()
+
+    def get(self, name):
+        """Loads the model if needed (e.g. warm-up), without pinning it."""
+        with self.use(name) as model:
+            return model
+
+    def _load(self, name):
+        """Loads the model, the condition being held."""
+        if name in self.loaded:
+            self.loaded.move_to_end(name)
+            return self.loaded[name]
+
+        loader, memory_mb = self.loaders[name]
+
+        # Make room before loading, so that both models are never resident together
+        if self.budget_mb is not None:
+            while self.loaded and self.resident_mb() + memory_mb > self.budget_mb:
+                unused = [n for n in self.loaded if self.in_use[n] == 0]
+                if unused:
+                    self._unload(unused[0])
+                else:
+                    # Every resident model is in use by another thread: wait for one
+                    self.condition.wait()
+
+            # Another thread may have loaded it while we were waiting
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+                return self.loaded[name]
+
+        start = time.perf_counter()
+        model = loader()
+        elapsed = time.perf_counter() - start
+
+        self.loads[name] += 1
+        self.load_seconds[name] += elapsed
+        self.loaded[name] = model
+        if self.verbose and self.loads[name] > 1:
+            print(f"    Reloaded {name} in {elapsed:.1f}s")
+
+        return model
+
+    def _unload(self, name):
+        """Unloads a model and gives its memory back, the condition being held."""
+        self.loaded.pop(name, None)
+        release_memory()
+        if self.verbose:
+            print(f"    Unloaded {name}")
+
+    def stats(self):
+        """Returns {name: (memory_mb, loads, load_seconds)}, picklable (e.g. from a batch worker)."""
+        return {
+            name: (memory_mb, self.loads[name], self.load_seconds[name])
+            for name, (_, memory_mb) in self.loaders.items()
+        }
+
+
+class ManagedEmbeddings(Embeddings):
+    """Embeddings fetched from the model manager at each call, so the embedder can be unloaded."""
+
+    def __init__(self, models, name):
+        self.models = models
+        self.name = name
+
+    def embed_documents(self, texts):
+        with self.models.use(self.name) as model:
+            return model.embed_documents(texts)
+
+    def embed_query(self, text):
+        with self.models.use(self.name) as model:
+            return model.embed_query(text)
+
+
+class StageMemory:
+    """
+    Tracks the peak RSS reached during each pipeline stage.
+    On Linux, the peak (VmHWM) is reset at the start of each stage, so the exact peak
+    of the stage is read at its end. Elsewhere, the process peak (ru_maxrss) is attributed
+    to the stage during which it grew, and the RSS at the end of the stage is used otherwise.
+    """
+
+    def __init__(self):
+        self.peaks = {}
+
+    @contextmanager
+    def stage(self, name):
+        reset = reset_peak_rss()
+        peak_before = peak_rss_mb()
+        try:
+            yield
+        finally:
+            peak_after = peak_rss_mb()
+            if reset or peak_after > peak_before:
+                peak = peak_after
+            else:
+                peak = current_rss_mb()
+            self._update(name, peak)
+
+    def record(self, name):
+        """
+        Records the peak RSS since the process started (or since the previous stage),
+        for work that is not wrapped in a stage (e.g. loading the pipeline).
+        """
+        self._update(name, peak_rss_mb())
+
+    def _update(self, name, peak):
+        self.peaks[name] = max(self.peaks.get(name, 0.0), peak)
+
+
+def print_report(stage_peaks, model_stats):
+    """Prints the peak RSS per stage and the model loads (see StageMemory and ModelManager.stats)."""
+    print("Peak RSS per stage:")
+    for stage, peak in stage_peaks.items():
+        print(f"  - {stage}: {peak:.0f} MB")
+
+    print("Model loads (reload latency vs memory):")
+    for name, (memory_mb, loads, load_seconds) in model_stats.items():
+        print(f"  - {name}: ~{memory_mb} MB | {loads} load(s), {load_seconds:.1f}s total")
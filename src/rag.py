@@ -1,15 +1,36 @@
 import json
+import multiprocessing
 import os
-
+import threading
+import time
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+import torch
 from langchain_chroma import Chroma
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_community.chat_models import ChatLlamaCpp
+from langchain_core.documents import Document
 from langchain_core.prompts import ChatPromptTemplate
 from sentence_transformers import CrossEncoder
 from rank_bm25 import BM25Okapi
 import config
+import text_processing
 import utils
 import ingestion
+import memory
+
+
+# Search structures swapped together on hot reload, so a query never mixes two versions of the corpus
+SearchIndex = namedtuple("SearchIndex", ["bm25_docs", "bm25", "vector_store"])
+
+
+def build_bm25(docs):
+    """Builds the BM25 index of the chunks."""
+    tokenized_corpus = [text_processing.tokenize(doc.page_content) for doc in docs]
+    return BM25Okapi(tokenized_corpus)
 
 
 class RAGPipeline:
@@ -19,24 +40,39 @@ class RAGPipeline:
         embedding_model_name=config.EMBEDDING_MODEL_NAME,
         rerank_config=config.AVAILABLE_RERANK_MODELS[config.DEFAULT_RERANK_MODEL],
         verbose=False,
+        adaptive_retrieval=False,
+        compress_context=False,
+        n_threads=None,
+        models_budget_mb=None,
+        print_answers=True,
     ):
         """
         Initializes the RAG pipeline resources.
         Checks for DB existence and runs ingestion if missing.
+        With a memory budget, the embedder and the reranker are unloaded between stages when needed.
+        Batch workers do not print answers (print_answers=False), the parent process does.
         """
         self.embedding_model_name = embedding_model_name
         self.verbose = verbose
+        self.print_answers = print_answers
         self.hybdrid_search = False
+        self.adaptive_retrieval = adaptive_retrieval
+        self.compress_context = compress_context
+        # Compressed chunks leave room in the budget for more sources
+        self.rerank_top_k = (
+            config.COMPRESSION_TOP_K if compress_context else config.TOP_K_RERANK
+        )
+        self.last_retrieval_stats = {}
+        self.models_budget_mb = models_budget_mb
+        self.stage_memory = memory.StageMemory()
+
+        # Embedder and reranker are loaded through the LRU model manager
+        self.models = memory.ModelManager(budget_mb=models_budget_mb, verbose=verbose)
 
         # Check for Chroma DB existence
-        if not os.path.exists(config.CHROMA_PATH) or not os.listdir(config.CHROMA_PATH):
-            if self.verbose:
-                print(
-                    f"Chroma DB not found at {config.CHROMA_PATH}. Running ingestion..."
-                )
-            ingestion.run_ingestion(
-                embedding_model_name=self.embedding_model_name, verbose=self.verbose
-            )
+        ensure_vector_store(
+            embedding_model_name=self.embedding_model_name, verbose=self.verbose
+        )
 
         if self.verbose:
             print("Loading resources...")
@@ -45,21 +81,29 @@ class RAGPipeline:
         if self.verbose:
             print("Building BM25 index...")
         # We use the shared utility to ensure BM25 sees exactly the same chunks as Chroma
-        self.bm25_docs = utils.load_and_split_docs()
-        tokenized_corpus = [doc.page_content.split() for doc in self.bm25_docs]
-        self.bm25 = BM25Okapi(tokenized_corpus)
+        bm25_docs = utils.load_and_split_docs()
+        bm25 = build_bm25(bm25_docs)
 
         # B. Standard RAG Components
-        self.embedding_model = HuggingFaceEmbeddings(
-            model_name=self.embedding_model_name
+        self.models.register(
+            "embedder",
+            lambda: HuggingFaceEmbeddings(model_name=self.embedding_model_name),
+            config.EMBEDDING_MEMORY_MB,
         )
+        self.models.get("embedder")
+        self.embedding_model = memory.ManagedEmbeddings(self.models, "embedder")
 
         # Chroma vector store
-        self.vector_store = Chroma(
+        vector_store = Chroma(
             persist_directory=config.CHROMA_PATH,
             embedding_function=self.embedding_model,
         )
 
+        self.index = SearchIndex(bm25_docs, bm25, vector_store)
+        # In-flight queries per index (by id), see use_index
+        self.index_users = Counter()
+        self.index_lock = threading.Lock()
+
         # LLM for answer generation
         if self.verbose:
             print(f"Loading LLM from {model_path}...")
@@ -68,13 +112,20 @@ class RAGPipeline:
             temperature=0,  # 0 for factual and deterministic answers
             max_tokens=config.MAX_TOKENS,
             n_ctx=2048,
+            n_threads=n_threads,  # None lets llama.cpp use all cores
+            use_mmap=True,  # Weights are shared between processes through the page cache
             verbose=False,
         )
 
         # Reranker for context selection
         if self.verbose:
             print(f"Loading Reranker {rerank_config['repo']}...")
-        self.reranker = CrossEncoder(rerank_config["repo"])
+        self.models.register(
+            "reranker",
+            lambda: CrossEncoder(rerank_config["repo"]),
+            rerank_config["memory_mb"],
+        )
+        self.models.get("reranker")
         self.score_threshold = rerank_config["score_threshold"]
 
         # As the context window is limited, we need to keep track of tokens used for separating chunks
@@ -83,38 +134,84 @@ class RAGPipeline:
         # Strict prompt to avoid hallucinations
         self.prompt = ChatPromptTemplate.from_template(config.STRICT_TEMPLATE)
 
+        # Peak since the process started, as no stage ran yet
+        self.stage_memory.record("load")
+
         if self.verbose:
             print("Resources loaded.")
 
-    def retrieve_context(self, query):
+    def retrieve_context(self, query, token_budget=config.MAX_TOKENS_SAFE):
         """
         Performs Hybrid retrieval (BM25 VIP + Vector + Reranking).
         Returns the list of selected Document objects.
         """
+        # Take the index once, as it may be swapped by a hot reload during the query
+        with self.use_index() as index:
+            return self._retrieve_from(index, query, token_budget)
+
+    def _retrieve_from(self, index, query, token_budget):
+        """Retrieval on a given search index (see retrieve_context)."""
         # A. Hybrid retrieval
 
         # BM25 retrieval (Top 1 VIP)
-        tokenized_query = query.split()
-        bm25_top_docs = self.bm25.get_top_n(tokenized_query, self.bm25_docs, n=1)
+        # Same tokenizer as the index
+        tokenized_query = text_processing.tokenize(query)
+        bm25_top_docs = index.bm25.get_top_n(tokenized_query, index.bm25_docs, n=1)
         vip_doc = bm25_top_docs[0] if bm25_top_docs else None
 
-        # Vector retrieval (Top 20)
-        vector_docs = self.vector_store.similarity_search(query, k=20)
+        # Vector retrieval + B. Reranking (Vector results only)
+        if self.adaptive_retrieval:
+            docs_with_scores = self._adaptive_rerank(
+                query, index.vector_store, token_budget
+            )
+        else:
+            # Vector retrieval (Top 20)
+            with self.stage_memory.stage("retrieve"):
+                vector_results = (
+                    index.vector_store.similarity_search_with_relevance_scores(
+                        query, k=config.VECTOR_TOP_K
+                    )
+                )
 
-        # B. Reranking (Vector results only)
-        pairs = [[query, doc.page_content] for doc in vector_docs]
-        scores = self.reranker.predict(pairs)
+            # Keep the vector relevance, to log it for the selected chunks
+            vector_docs = []
+            for doc, relevance in vector_results:
+                doc.metadata["vector_relevance"] = relevance
+                vector_docs.append(doc)
+
+            pairs = [[query, doc.page_content] for doc in vector_docs]
+            scores = self._rerank(pairs)
+
+            # Combine docs with their scores
+            docs_with_scores = list(zip(vector_docs, scores))
+            self.last_retrieval_stats = {
+                "k": config.VECTOR_TOP_K,
+                "pairs_scored": len(pairs),
+                "stop_reason": "fixed",
+            }
 
-        # Combine docs with their scores and sort by score descending
-        docs_with_scores = list(zip(vector_docs, scores))
+        if self.verbose:
+            stats = self.last_retrieval_stats
+            print(
+                f"    Reranker: {stats['pairs_scored']} pairs scored | k={stats['k']} | Stop: {stats['stop_reason']}"
+            )
+
+        # Sort by score descending
         docs_with_scores.sort(key=lambda x: x[1], reverse=True)
 
         # Keep only the top N documents after reranking
-        docs_with_scores = docs_with_scores[: config.TOP_K_RERANK]
+        docs_with_scores = docs_with_scores[: self.rerank_top_k]
+
+        # Optional extractive compression of the best chunks
+        self.last_retrieval_stats["compression_pairs"] = 0
+        if self.compress_context:
+            docs_with_scores = self._compress_docs(query, docs_with_scores)
 
         # C. Context selection (BM25 VIP + Best reranked)
         selected_docs = []
         current_tokens = 0
+        tokens_saved = 0
+        selected_relevances = []
         included_contents = set()
 
         # 1. Force include BM25 VIP Doc
@@ -139,7 +236,7 @@ class RAGPipeline:
             tokens = self.llm.get_num_tokens(content)
 
             # Ensure the token budget won't be exceeded
-            if current_tokens + tokens > config.MAX_TOKENS_SAFE:
+            if current_tokens + tokens > token_budget:
                 if self.verbose:
                     print(
                         f"    - Skipped (budget) | Score: {score:.4f} Tokens: {tokens} | {doc.metadata['source']}"
@@ -159,13 +256,199 @@ class RAGPipeline:
             # Add also separator tokens count, as adding a document after will always require a separator
             current_tokens += tokens + self.doc_separator_tokens
             included_contents.add(content)
+            original_tokens = doc.metadata.get("original_tokens", tokens)
+            tokens_saved += original_tokens - tokens
+            selected_relevances.append(doc.metadata["vector_relevance"])
             if self.verbose:
+                compression_info = (
+                    f" (from {original_tokens})" if original_tokens != tokens else ""
+                )
                 print(
-                    f"    + Selected (Vector) | Score: {score:.4f} Tokens: {tokens} | {doc.metadata['source']}"
+                    f"    + Selected (Vector) | Score: {score:.4f} Tokens: {tokens}{compression_info} | {doc.metadata['source']}"
                 )
 
+        self.last_retrieval_stats["tokens_saved"] = tokens_saved
+        # Lowest vector relevance that still led to a selected chunk (to tune ADAPTIVE_MIN_RELEVANCE)
+        self.last_retrieval_stats["min_selected_relevance"] = (
+            min(selected_relevances) if selected_relevances else None
+        )
+
         return selected_docs
 
+    def _rerank(self, pairs):
+        """
+        Scores (query, text) pairs with the reranker.
+        The reranker cannot be unloaded while in use (e.g. by a hot reload), and no reference
+        to it outlives this call, so that the model manager can actually free it afterwards.
+        """
+        with self.stage_memory.stage("rerank"):
+            with self.models.use("reranker") as reranker:
+                return reranker.predict(pairs)
+
+    def _compress_docs(self, query, docs_with_scores):
+        """
+        Extractive compression: scores the spans (sentences, list items, whole procedures)
+        of the candidate chunks against the query, in a single reranker batch,
+        and keeps the relevant spans in their original order.
+        Returns the list of (Document, score) tuples, with compressed copies of the chunks.
+        """
+        # Split the chunks worth compressing (relevant and large enough)
+        split_docs = {}
+        pairs = []
+        for i, (doc, score) in enumerate(docs_with_scores):
+            if score < self.score_threshold:
+                continue
+            tokens = self.llm.get_num_tokens(doc.page_content)
+            if tokens < config.COMPRESSION_MIN_TOKENS:
+                continue
+            header, spans = utils.split_into_spans(doc.page_content)
+            if len(spans) < 2:
+                continue
+            split_docs[i] = (header, spans, tokens, len(pairs))
+            pairs.extend([query, span] for _, span in spans)
+
+        if not pairs:
+            return docs_with_scores
+
+        span_scores = self._rerank(pairs)
+        # Counted apart, as pairs_scored is compared against the fixed Top-20 reranking
+        self.last_retrieval_stats["compression_pairs"] = len(pairs)
+
+        compressed = list(docs_with_scores)
+        for i, (header, spans, tokens, offset) in split_docs.items():
+            doc, score = docs_with_scores[i]
+            scores = span_scores[offset : offset + len(spans)]
+
+            # Keep spans above the reranker threshold, and at least the best one
+            best = max(range(len(spans)), key=lambda j: scores[j])
+            kept = [
+                span
+                for j, span in enumerate(spans)
+                if scores[j] >= self.score_threshold or j == best
+            ]
+            if len(kept) == len(spans):
+                continue
+
+            content = utils.join_spans(header, kept)
+            compressed_doc = Document(
+                page_content=content,
+                metadata={**doc.metadata, "original_tokens": tokens},
+            )
+            compressed[i] = (compressed_doc, score)
+
+        return compressed
+
+    def _adaptive_rerank(self, query, vector_store, token_budget):
+        """
+        Reranks vector candidates in small increments instead of scoring all of them.
+        Stops when enough chunks pass the score threshold (or fill the token budget),
+        or when the remaining candidates are below the vector relevance cutoff.
+        k is only widened when too few chunks pass.
+        Returns the list of (Document, score) tuples that were scored.
+        """
+        k = config.ADAPTIVE_K_INITIAL
+        step = config.ADAPTIVE_RERANK_STEP
+        docs_with_scores = []
+        scored_contents = set()
+        passing_count = 0
+        passing_tokens = 0
+        stop_reason = None
+
+        while stop_reason is None:
+            # Candidates come sorted by relevance (best first)
+            with self.stage_memory.stage("retrieve"):
+                candidates = vector_store.similarity_search_with_relevance_scores(
+                    query, k=k
+                )
+            # When k is widened, skip the candidates already scored
+            pending = [
+                (doc, relevance)
+                for doc, relevance in candidates
+                if doc.page_content not in scored_contents
+            ]
+
+            for start in range(0, len(pending), step):
+                increment = pending[start : start + step]
+                batch = [
+                    doc
+                    for doc, relevance in increment
+                    if relevance >= config.ADAPTIVE_MIN_RELEVANCE
+                ]
+
+                for doc, relevance in increment:
+                    doc.metadata["vector_relevance"] = relevance
+
+                if batch:
+                    scores = self._rerank(
+                        [[query, doc.page_content] for doc in batch]
+                    )
+                    for doc, score in zip(batch, scores):
+                        docs_with_scores.append((doc, score))
+                        scored_contents.add(doc.page_content)
+                        if score >= self.score_threshold:
+                            passing_count += 1
+                            passing_tokens += (
+                                self.llm.get_num_tokens(doc.page_content)
+                                + self.doc_separator_tokens
+                            )
+
+                if (
+                    passing_count >= self.rerank_top_k
+                    or passing_tokens >= token_budget
+                ):
+                    stop_reason = "enough chunks"
+                    break
+
+                # The list is sorted, so every remaining candidate is below the cutoff
+                if len(batch) < len(increment):
+                    stop_reason = "low similarity"
+                    break
+
+            if stop_reason is None:
+                # Too few chunks passed: widen k, unless the store has nothing more to give
+                if len(candidates) < k or k >= config.ADAPTIVE_K_MAX:
+                    stop_reason = "candidates exhausted"
+                else:
+                    k = min(k * 2, config.ADAPTIVE_K_MAX)
+
+        self.last_retrieval_stats = {
+            "k": k,
+            "pairs_scored": len(docs_with_scores),
+            "stop_reason": stop_reason,
+        }
+
+        return docs_with_scores
+
+    @contextmanager
+    def use_index(self):
+        """
+        Yields the current search index, counted as in use until the block exits,
+        so that a hot reload does not delete it under an in-flight query.
+        """
+        with self.index_lock:
+            index = self.index
+            self.index_users[id(index)] += 1
+        try:
+            yield index
+        finally:
+            with self.index_lock:
+                self.index_users[id(index)] -= 1
+                if not self.index_users[id(index)]:
+                    del self.index_users[id(index)]
+
+    def index_in_use(self, index):
+        """Whether a query still uses this (possibly swapped out) index."""
+        with self.index_lock:
+            return id(index) in self.index_users
+
+    def swap_index(self, index):
+        """
+        Replaces the search index (hot reload).
+        A single reference assignment: in-flight queries keep the index they started with.
+        """
+        with self.index_lock:
+            self.index = index
+
     def answer_question(self, question, answer=True):
         """
         Generates an answer for a single question.
@@ -182,31 +465,62 @@ class RAGPipeline:
             return {
                 "answer": None,
                 "context": [doc.metadata["source"] for doc in selected_docs],
+                "retrieval_stats": self.last_retrieval_stats,
             }
 
-        # 2. Format context
+        # 2. Generate
+        answer_text = self.generate_answer(question, selected_docs)
+
+        return {
+            "answer": answer_text,
+            "context": [doc.metadata["source"] for doc in selected_docs],
+            "retrieval_stats": self.last_retrieval_stats,
+        }
+
+    def generate_answer(self, question, selected_docs, history=None):
+        """
+        Formats the context (and the conversation history, if any) and generates the answer.
+        """
+        # Format context
         context_text = config.DOC_SEPARATOR.join(
             [doc.page_content for doc in selected_docs]
         )
+        if history:
+            # The history has its own slice of the context budget
+            context_text = config.HISTORY_FORMAT.format(
+                history=history, context=context_text
+            )
         if self.verbose:
             print(
                 f"\nTotal context tokens: {self.llm.get_num_tokens(context_text)}/{config.MAX_TOKENS}"
             )
 
-        # 3. Generate
+        # Generate
         message = self.prompt.format(context=context_text, question=question)
-        response = self.llm.invoke(message)
+        with self.stage_memory.stage("generate"):
+            response = self.llm.invoke(message)
 
-        if self.verbose:
-            print(f"ANSWER:\n{'-' * 100}\n{response.content}\n{'-' * 100}")
-        else:
-            print(f"\n{response.content}\n")
+        if self.print_answers:
+            if self.verbose:
+                print(f"ANSWER:\n{'-' * 100}\n{response.content}\n{'-' * 100}")
+            else:
+                print(f"\n{response.content}\n")
 
+        return response.content
+
+    def memory_stats(self):
+        """Returns the peak RSS per stage and the model loads."""
         return {
-            "answer": response.content,
-            "context": [doc.metadata["source"] for doc in selected_docs],
+            "stage_peaks": dict(self.stage_memory.peaks),
+            "models": self.models.stats(),
         }
 
+    def print_memory_report(self):
+        """Prints the peak RSS per stage and the model reloads."""
+        print(f"\nMemory budget for embedder/reranker: {self.models_budget_mb} MB")
+        stats = self.memory_stats()
+        memory.print_report(stats["stage_peaks"], stats["models"])
+
     def run_batch(self, input_file, output_file, answer=True):
         """
         Runs the pipeline on a JSON file containing a list of questions.
@@ -218,22 +532,256 @@ class RAGPipeline:
         results = []
         for q_item in questions_data["questions"]:
             output = self.answer_question(q_item["question"], answer=answer)
+            results.append(format_result(q_item, output))
 
-            results.append(
-                {
-                    "id": q_item["id"],
-                    "question": q_item["question"],
-                    "answer": output["answer"],
-                    "context": output["context"],
-                }
-            )
+        if self.verbose:
+            print_batch_summary(results, compress_context=self.compress_context)
+            if self.models_budget_mb is not None:
+                self.print_memory_report()
 
         if answer:
-            with open(output_file, "w") as f:
-                json.dump({"answers": results}, f, indent=2)
+            save_results(results, output_file, verbose=self.verbose)
+
+
+def ensure_vector_store(embedding_model_name=config.EMBEDDING_MODEL_NAME, verbose=False):
+    """
+    Checks for Chroma DB existence and runs ingestion if missing.
+    """
+    if not os.path.exists(config.CHROMA_PATH) or not os.listdir(config.CHROMA_PATH):
+        if verbose:
+            print(f"Chroma DB not found at {config.CHROMA_PATH}. Running ingestion...")
+        ingestion.run_ingestion(
+            embedding_model_name=embedding_model_name, verbose=verbose
+        )
 
-            if self.verbose:
-                print(f"Answers saved to {output_file}")
+
+def format_result(q_item, output):
+    """Builds the results JSON entry of a question."""
+    return {
+        "id": q_item["id"],
+        "question": q_item["question"],
+        "answer": output["answer"],
+        "context": output["context"],
+        "retrieval_stats": output["retrieval_stats"],
+    }
+
+
+def save_results(results, output_file, verbose=False):
+    """Saves the answers to the results JSON file."""
+    with open(output_file, "w") as f:
+        json.dump({"answers": results}, f, indent=2)
+
+    if verbose:
+        print(f"Answers saved to {output_file}")
+
+
+def print_batch_summary(results, compress_context=False):
+    """
+    Prints the retrieval statistics of a batch run.
+    """
+    if not results:
+        return
+
+    # Compare reranker work against the fixed Top-20 mode
+    pairs_scored = sum(r["retrieval_stats"]["pairs_scored"] for r in results)
+    pairs_fixed = config.VECTOR_TOP_K * len(results)
+    print(
+        f"\nReranker pairs scored: {pairs_scored} ({pairs_scored / len(results):.1f}/question) "
+        f"vs {pairs_fixed} in fixed mode ({1 - pairs_scored / pairs_fixed:.0%} saved)"
+    )
+
+    sources = sum(len(r["context"]) for r in results)
+    print(f"Sources: {sources / len(results):.1f}/question")
+
+    # Historical cutoff for adaptive retrieval: no selected chunk was below this relevance
+    relevances = [
+        r["retrieval_stats"]["min_selected_relevance"]
+        for r in results
+        if r["retrieval_stats"]["min_selected_relevance"] is not None
+    ]
+    if relevances:
+        print(
+            f"Lowest vector relevance of a selected chunk: {min(relevances):.3f} "
+            f"(ADAPTIVE_MIN_RELEVANCE = {config.ADAPTIVE_MIN_RELEVANCE})"
+        )
+    if compress_context:
+        tokens_saved = sum(r["retrieval_stats"]["tokens_saved"] for r in results)
+        compression_pairs = sum(
+            r["retrieval_stats"]["compression_pairs"] for r in results
+        )
+        print(
+            f"Context tokens saved by compression: {tokens_saved} "
+            f"(compression pairs scored: {compression_pairs})"
+        )
+
+    # Retrieval metrics, to compare the impact of retrieval options
+    if os.path.exists(config.GROUND_TRUTH_FILE):
+        ground_truth = {
+            q["id"]: q["sources"]
+            for q in utils.load_json(config.GROUND_TRUTH_FILE)["questions"]
+        }
+        metrics = [
+            utils.source_metrics(r["context"], ground_truth[r["id"]])
+            for r in results
+            if r["id"] in ground_truth
+        ]
+        if metrics:
+            recall = sum(m[0] for m in metrics) / len(metrics)
+            precision = sum(m[1] for m in metrics) / len(metrics)
+            print(f"Source recall: {recall:.2f} | Source precision: {precision:.2f}")
+
+
+# Pipeline of the current worker process (multi-process batch mode)
+_worker_pipeline = None
+
+
+def _init_worker(pipeline_kwargs, n_threads, loaded):
+    """
+    Loads a pipeline in the worker process, with its own llama.cpp context.
+    Then waits for every worker to be loaded, so that model loading stays out of the throughput.
+    """
+    global _worker_pipeline
+
+    # Torch (embeddings and reranker) must also stay within the worker's share of the cores
+    torch.set_num_threads(n_threads)
+    # Answers are printed by the parent process, labelled with their question
+    _worker_pipeline = RAGPipeline(
+        n_threads=n_threads, verbose=False, print_answers=False, **pipeline_kwargs
+    )
+    loaded.wait()
+
+
+def _answer_in_worker(task):
+    """Answers a single question in a worker process."""
+    index, q_item, answer = task
+
+    start = time.time()
+    output = _worker_pipeline.answer_question(q_item["question"], answer=answer)
+    end = time.time()
+
+    return (
+        index,
+        format_result(q_item, output),
+        start,
+        end,
+        os.getpid(),
+        _worker_pipeline.memory_stats(),
+    )
+
+
+def run_batch_parallel(
+    input_file, output_file, workers, answer=True, verbose=False, **pipeline_kwargs
+):
+    """
+    Runs the batch on several worker processes, each with its own pipeline.
+    The cores are split between workers, GGUF weights are shared through mmap,
+    and questions are handed out one at a time so that fast workers take more of them.
+    Results are merged in question order into the same results JSON.
+    """
+    if verbose:
+        print(f"Loading questions from {input_file}...")
+    questions_data = utils.load_json(input_file)
+    q_items = questions_data["questions"]
+
+    # Ingest once before starting, so that workers do not race on the Chroma DB
+    ensure_vector_store(
+        embedding_model_name=pipeline_kwargs.get(
+            "embedding_model_name", config.EMBEDDING_MODEL_NAME
+        ),
+        verbose=verbose,
+    )
+
+    # Every worker must take a question, as they all wait for each other after loading
+    workers = max(1, min(workers, len(q_items)))
+    n_threads = max(1, utils.available_cpus() // workers)
+    if verbose:
+        print(f"Starting {workers} workers ({n_threads} threads each)...")
+
+    tasks = [(i, q_item, answer) for i, q_item in enumerate(q_items)]
+    results = [None] * len(tasks)
+    starts, ends = [], []
+    # Latest memory stats of each worker (pid)
+    worker_stats = {}
+
+    # Spawn (not fork), as torch and llama.cpp do not survive a fork with loaded models.
+    # Unlike multiprocessing.Pool, the executor does not respawn a worker whose initializer
+    # failed (missing GGUF file, out of memory): the batch fails instead of hanging.
+    context = multiprocessing.get_context("spawn")
+    # Released once every worker has loaded its pipeline (a failed worker breaks the pool,
+    # which terminates the waiting ones)
+    loaded = context.Barrier(workers)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(pipeline_kwargs, n_threads, loaded),
+        ) as executor:
+            futures = [executor.submit(_answer_in_worker, task) for task in tasks]
+            for future in as_completed(futures):
+                index, result, start, end, pid, stats = future.result()
+                results[index] = result
+                starts.append(start)
+                ends.append(end)
+                worker_stats[pid] = stats
+                if answer and not verbose:
+                    print(f"\n[{result['id']}] {result['question']}\n{result['answer']}\n")
+    except BrokenProcessPool as e:
+        raise RuntimeError(
+            "A batch worker failed to start or crashed (see the error above)"
+        ) from e
+
+    if verbose:
+        print_batch_summary(
+            results, compress_context=pipeline_kwargs.get("compress_context", False)
+        )
+        models_budget_mb = pipeline_kwargs.get("models_budget_mb")
+        if models_budget_mb is not None:
+            print(
+                f"\nMemory budget for embedder/reranker: {models_budget_mb} MB (per worker)"
+            )
+            for i, stats in enumerate(worker_stats.values(), start=1):
+                print(f"\nWorker {i}:")
+                memory.print_report(stats["stage_peaks"], stats["models"])
+
+    if starts:
+        # Model loading is excluded: workers only start once all of them are loaded
+        elapsed = max(ends) - min(starts)
+        throughput = len(results) / elapsed
+        print(
+            f"\nThroughput: {throughput:.3f} questions/s ({len(results)} questions in {elapsed:.1f}s, {workers} workers)"
+        )
+
+        # Scaling efficiency against the last single worker run of the same configuration
+        # (model, mode and retrieval options all change the cost of a question)
+        run_key = "|".join(
+            [
+                os.path.basename(pipeline_kwargs.get("model_path", "")),
+                "batch" if answer else "rerank",
+                f"adaptive={pipeline_kwargs.get('adaptive_retrieval', False)}",
+                f"compress={pipeline_kwargs.get('compress_context', False)}",
+            ]
+        )
+        records = (
+            utils.load_json(config.THROUGHPUT_FILE)
+            if os.path.exists(config.THROUGHPUT_FILE)
+            else {}
+        )
+        run_records = records.setdefault(run_key, {})
+        run_records[str(workers)] = throughput
+        with open(config.THROUGHPUT_FILE, "w") as f:
+            json.dump(records, f, indent=2)
+
+        if "1" in run_records:
+            efficiency = throughput / (workers * run_records["1"])
+            print(f"Scaling efficiency vs 1 worker: {efficiency:.0%}")
+        else:
+            print(
+                "Run with --workers 1 (same mode and options) to measure the scaling efficiency."
+            )
+
+    if answer:
+        save_results(results, output_file, verbose=verbose)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,210 @@
+import os
+import re
+import time
+from functools import lru_cache
+
+import config
+
+# Typographic characters replaced by their ASCII equivalents, important if we want to use small LLMs.
+REPLACEMENTS = {
+    "\u2018": "'",  # opening smart single quote
+    "\u2019": "'",  # closing smart single quote
+    "\u201c": '"',  # opening smart double quote
+    "\u201d": '"',  # closing smart double quote
+    "\u2013": "-",  # simple dash
+    "\u2014": "--",  # double dash
+    "\u00a0": " ",  # non-breaking space
+    "\u2026": "...",  # ellipsis
+    "\u2022": "-",  # bullet
+    "\u201a": ",",  # low single quote
+    "\u201e": '"',  # low double quote
+    "\u2039": "<",  # single angle quote
+    "\u203a": ">",  # single angle quote
+}
+
+
+def _cp1252_replacements():
+    """
+    Maps the C1 control characters (Windows-1252 bytes decoded as latin-1) to the
+    Windows-1252 characters, typographic ones directly to their ASCII equivalents (listed first).
+    Bytes undefined in Windows-1252 are kept.
+    """
+    replacements = {}
+    for byte in range(0x80, 0xA0):
+        try:
+            char = bytes([byte]).decode("cp1252")
+        except UnicodeDecodeError:
+            continue
+        replacements[chr(byte)] = REPLACEMENTS.get(char, char)
+    return dict(
+        sorted(replacements.items(), key=lambda item: item[1].isascii(), reverse=True)
+    )
+
+
+# Docs mix Windows-1252 and UTF-8
+CP1252_REPLACEMENTS = _cp1252_replacements()
+
+# Unicode letters and digits (accented words are kept whole)
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+# ASCII fast path of the tokenizer: lowercase letters and digits, everything else becomes a space.
+# A 1:1 ASCII table keeps str.translate on its fast path.
+TOKEN_TABLE = str.maketrans(
+    {
+        chr(i): chr(i).lower() if chr(i).isalnum() else " "
+        for i in range(128)
+    }
+)
+
+# Plurals only: a trailing "s" is stripped, except in "ss", "us" and "is" endings (class, status, analysis)
+STEM_KEPT_ENDINGS = ("ss", "us", "is")
+STEM_MIN_LENGTH = 4
+
+
+def decode(raw):
+    """
+    Decodes file content: UTF-8 when valid, Windows-1252 otherwise (never fails).
+    Windows-1252 is decoded as latin-1 and its characters mapped with CP1252_REPLACEMENTS
+    (much faster than the cp1252 codec).
+    """
+    # Most docs are plain ASCII: no encoding to detect
+    if raw.isascii():
+        return raw.decode("ascii")
+    # Invalid UTF-8 shows up as U+FFFD, without the cost of an exception
+    text = raw.decode("utf-8", "replace")
+    if "\ufffd" not in text:
+        return text.removeprefix("\ufeff")
+    latin_text = raw.decode("latin-1")
+    # Unless the doc contains an actual U+FFFD (its UTF-8 bytes as seen by latin-1)
+    if "\xef\xbf\xbd" in latin_text:
+        try:
+            return raw.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            pass
+    return _replace_present(latin_text, CP1252_REPLACEMENTS)
+
+
+def _replace_present(text, replacements):
+    """
+    Replaces only the characters present. Membership tests and str.replace are C-level scans,
+    faster here than a single regex pass (Python callback per match) or str.translate with a dict table.
+    Stops as soon as the text is plain ASCII.
+    """
+    for c, r in replacements.items():
+        if c in text:
+            text = text.replace(c, r)
+            if text.isascii():
+                break
+    return text
+
+
+def normalize_text(text):
+    """Replaces typographic characters with their ASCII equivalents."""
+    # Most docs are plain ASCII: nothing to replace
+    if text.isascii():
+        return text
+    return _replace_present(text, REPLACEMENTS)
+
+
+def read_text(file_path):
+    """Reads, decodes and normalizes a document."""
+    with open(file_path, "rb") as f:
+        text = decode(f.read())
+    # Universal newlines, as in text mode
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return normalize_text(text)
+
+
+@lru_cache(maxsize=65536)
+def stem(token):
+    """
+    Reduces plurals to their singular ("modes" -> "mode"), so that both forms match
+    (cached, as the vocabulary is small).
+    """
+    if (
+        len(token) >= STEM_MIN_LENGTH
+        and token.endswith("s")
+        and not token.endswith(STEM_KEPT_ENDINGS)
+    ):
+        return token[:-1]
+    return token
+
+
+def tokenize(text, stemming=config.BM25_STEMMING):
+    """
+    Tokenizer shared by BM25 indexing and queries:
+    lowercasing, punctuation stripping and optional stemming.
+    """
+    if text.isascii():
+        tokens = text.translate(TOKEN_TABLE).split()
+    else:
+        tokens = TOKEN_PATTERN.findall(text.lower())
+    if stemming:
+        return [stem(token) for token in tokens]
+    return tokens
+
+
+def _legacy_clean_text(text):
+    """Previous implementation (one str.replace pass per character), for the benchmark."""
+    for c in "\x91\x92\x93\x94\x96\x97":
+        text = text.replace(c, CP1252_REPLACEMENTS[c])
+    return text
+
+
+def run_benchmark(size_mb=8):
+    """
+    Micro-benchmark on a synthetic corpus built from the docs, with both encodings.
+    """
+    # config.DOCS_DIR is relative to the repository root
+    docs_dir = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), os.pardir, config.DOCS_DIR
+    )
+    samples = []
+    for filename in sorted(os.listdir(docs_dir)):
+        with open(os.path.join(docs_dir, filename), "rb") as f:
+            samples.append(f.read())
+    # Make sure the corpus contains smart quotes in both encodings
+    samples.append("\u201cQuoted\u201d \u2013 text\n".encode("utf-8"))
+    samples.append("\u201cQuoted\u201d \u2013 text\n".encode("cp1252"))
+
+    target = size_mb * 1024 * 1024
+    files = []
+    total = 0
+    while total < target:
+        for sample in samples:
+            files.append(sample)
+            total += len(sample)
+
+    def measure(label, process):
+        start = time.perf_counter()
+        for raw in files:
+            process(raw)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<40} {total / elapsed / 1024 / 1024:8.1f} MB/s")
+
+    print(f"Synthetic corpus: {len(files)} files, {total / 1024 / 1024:.1f} MB\n")
+    measure(
+        "Legacy (latin-1 + replace + split)",
+        lambda raw: _legacy_clean_text(raw.decode("latin-1")).split(),
+    )
+    measure(
+        "Legacy normalization (latin-1 + replace)",
+        lambda raw: _legacy_clean_text(raw.decode("latin-1")),
+    )
+    measure(
+        "Normalization (detect + replace present)",
+        lambda raw: normalize_text(decode(raw)),
+    )
+    measure(
+        "Shared tokenizer (no stemming)",
+        lambda raw: tokenize(normalize_text(decode(raw)), stemming=False),
+    )
+    measure(
+        "Shared tokenizer (cached stemming)",
+        lambda raw: tokenize(normalize_text(decode(raw)), stemming=True),
+    )
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -1,11 +1,14 @@
 import os
+import re
 import json
+import hashlib
 from huggingface_hub import hf_hub_download
 from langchain_text_splitters import (
     RecursiveCharacterTextSplitter,
     MarkdownHeaderTextSplitter,
 )
 import config
+import text_processing
 
 
 def ensure_model_exists(model_key):
@@ -39,23 +42,6 @@ def ensure_model_exists(model_key):
     return path
 
 
-def clean_text(text):
-    """Cleans up text by replacing non-ASCII characters with their ASCII equivalents"""
-    replacements = {
-        "\x91": "'",  # opening smart single quote
-        "\x92": "'",  # closing smart single quote
-        "\x93": '"',  # opening smart double quote
-        "\x94": '"',  # closing smart double quote
-        "\x96": "-",  # simple dash
-        "\x97": "--",  # double dash
-    }
-
-    for c, r in replacements.items():
-        text = text.replace(c, r)
-
-    return text
-
-
 def load_and_split_docs():
     """
     Loads, cleans, and splits documents.
@@ -63,6 +49,20 @@ def load_and_split_docs():
     """
     files = [os.path.join(config.DOCS_DIR, f) for f in os.listdir(config.DOCS_DIR)]
 
+    docs = []
+    for file in files:
+        docs.extend(load_and_split_file(file))
+
+    return docs
+
+
+def load_and_split_file(file):
+    """
+    Loads, cleans, and splits a single document.
+    Used for the whole corpus, and to re-chunk only the changed files on hot reload.
+    """
+    filename = os.path.basename(file)
+
     # MarkdownHeaderTextSplitter to split by markdown headers
     headers_to_split_on = [("#", "Header 1"), ("##", "Header 2")]
     md_splitter = MarkdownHeaderTextSplitter(headers_to_split_on)
@@ -72,38 +72,143 @@ def load_and_split_docs():
         chunk_size=config.CHUNK_SIZE, chunk_overlap=config.CHUNK_OVERLAP
     )
 
-    docs = []
+    # Docs mix encodings and contain non-ASCII characters, replaced with their ASCII equivalents
+    content = text_processing.read_text(file)
 
-    for file in files:
-        filename = os.path.basename(file)
+    # Split by markdown headers
+    md_docs = md_splitter.split_text(content)
 
-        # Docs contain non-ASCII characters, so we need to adapt the encoding
-        with open(file, "r", encoding="latin-1") as f:
-            # We clean up the text by replacing non-ASCII characters with their ASCII equivalents, important if we want to use small LLMs
-            content = clean_text(f.read())
+    # Add metadata (file name) and inject headers + filename into content
+    for doc in md_docs:
+        doc.metadata["source"] = file
 
-            # Split by markdown headers
-            md_docs = md_splitter.split_text(content)
+        # Re-inject headers into the content so embeddings/LLM see the context
+        header_context = f"Source Document: {filename}\n"
 
-            # Add metadata (file name) and inject headers + filename into content
-            for doc in md_docs:
-                doc.metadata["source"] = file
+        if "Header 1" in doc.metadata:
+            header_context += f"# {doc.metadata['Header 1']}\n"
+        if "Header 2" in doc.metadata:
+            header_context += f"## {doc.metadata['Header 2']}\n"
 
-                # Re-inject headers into the content so embeddings/LLM see the context
-                header_context = f"Source Document: {filename}\n"
+        doc.page_content = f"{header_context}\n{doc.page_content}"
 
-                if "Header 1" in doc.metadata:
-                    header_context += f"# {doc.metadata['Header 1']}\n"
-                if "Header 2" in doc.metadata:
-                    header_context += f"## {doc.metadata['Header 2']}\n"
+    # Split by chunks
+    return text_splitter.split_documents(md_docs)
 
-                doc.page_content = f"{header_context}\n{doc.page_content}"
 
-            # Split by chunks
-            chunks = text_splitter.split_documents(md_docs)
-            docs.extend(chunks)
+# Numbered procedure steps ("1. ...", "2) ...") and bullet list items
+NUMBERED_ITEM_PATTERN = re.compile(r"^\s*\d+[.)]\s")
+BULLET_ITEM_PATTERN = re.compile(r"^\s*[-*+]\s")
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
 
-    return docs
+
+def split_into_spans(content):
+    """
+    Splits a chunk into a header and scorable spans for extractive compression.
+    The header (injected source and markdown headers) is returned apart, as it must always be kept.
+    Spans are (block index, text) tuples: a whole numbered procedure is one span so its steps stay intact,
+    list items are one span each, and paragraphs are split into sentences.
+    """
+    lines = content.split("\n")
+
+    # Leading lines injected by load_and_split_docs
+    header_lines = []
+    while lines and (
+        lines[0].startswith("Source Document:") or lines[0].startswith("#")
+    ):
+        header_lines.append(lines.pop(0))
+
+    # Group lines into blocks: procedures, list items and paragraphs
+    blocks = []
+    current = []
+    current_kind = None
+    for line in lines:
+        if not line.strip():
+            if current:
+                blocks.append((current_kind, current))
+            current, current_kind = [], None
+        elif NUMBERED_ITEM_PATTERN.match(line):
+            if current and current_kind != "procedure":
+                blocks.append((current_kind, current))
+                current = []
+            current_kind = "procedure"
+            current.append(line)
+        elif BULLET_ITEM_PATTERN.match(line):
+            if current:
+                blocks.append((current_kind, current))
+            current, current_kind = [line], "item"
+        elif current_kind in ("procedure", "item") and line.startswith((" ", "\t")):
+            # Continuation of a step or list item
+            current.append(line)
+        else:
+            if current and current_kind != "paragraph":
+                blocks.append((current_kind, current))
+                current = []
+            current_kind = "paragraph"
+            current.append(line)
+    if current:
+        blocks.append((current_kind, current))
+
+    spans = []
+    for index, (kind, block_lines) in enumerate(blocks):
+        if kind == "paragraph":
+            paragraph = " ".join(line.strip() for line in block_lines)
+            spans.extend(
+                (index, sentence)
+                for sentence in SENTENCE_END_PATTERN.split(paragraph)
+                if sentence
+            )
+        else:
+            spans.append((index, "\n".join(block_lines)))
+
+    return "\n".join(header_lines), spans
+
+
+def join_spans(header, spans):
+    """Rebuilds a chunk from its header and the kept spans (in original order)."""
+    text = ""
+    previous_index = None
+    for index, span in spans:
+        if previous_index is None:
+            text += span
+        elif index == previous_index:
+            # Sentences of the same paragraph
+            text += " " + span
+        else:
+            text += "\n\n" + span
+        previous_index = index
+
+    return f"{header}\n\n{text}" if header else text
+
+
+def source_metrics(context, expected_sources):
+    """
+    Computes the retrieval recall and precision of the retrieved sources (file paths)
+    against the expected sources (file names) of the ground truth.
+    """
+    retrieved = {os.path.basename(source) for source in context}
+    expected = set(expected_sources)
+    hits = len(retrieved & expected)
+
+    recall = hits / len(expected) if expected else 1.0
+    precision = hits / len(retrieved) if retrieved else 0.0
+    return recall, precision
+
+
+def available_cpus():
+    """Returns the number of cores usable by this process."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def file_hash(file_path):
+    """Returns the SHA-256 hash of a file content."""
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            sha.update(block)
+    return sha.hexdigest()
 
 
 def load_json(file_path):
@@ -0,0 +1,209 @@
+import os
+import threading
+import uuid
+
+from langchain_chroma import Chroma
+import config
+import utils
+from rag import SearchIndex, build_bm25
+
+
+class DocsWatcher:
+    """
+    Watches the docs directory and hot reloads the index of a running RAGPipeline.
+    Polls mtimes (and hashes on change) so it runs anywhere, re-chunks and re-embeds only
+    the changed files on a background thread, builds the new BM25 and vector structures
+    off to the side, then swaps them into the pipeline in one assignment. Models are not reloaded.
+    """
+
+    def __init__(self, pipeline, interval=config.WATCH_INTERVAL, verbose=False):
+        self.pipeline = pipeline
+        self.interval = interval
+        self.verbose = verbose
+        self.generation = 0
+
+        # Persisted store, kept in sync so that the next session starts up to date
+        self.persisted_store = pipeline.index.vector_store
+        # Swapped out in-memory indexes, deleted once no in-flight query uses them
+        self.retired = []
+        # Persisted store updates not applied yet (retried on the next poll if they fail)
+        self.pending_sync = []
+
+        # Chunks per file, to rebuild BM25 without re-chunking unchanged files
+        self.chunks_by_file = {}
+        for doc in pipeline.index.bm25_docs:
+            self.chunks_by_file.setdefault(doc.metadata["source"], []).append(doc)
+
+        self.files = self._scan({})
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Starts polling on a daemon thread."""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops polling and waits for the current reload to finish."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                # Keep serving the current index, and retry on the next poll
+                print(f"Hot reload failed: {e}")
+
+    def _scan(self, previous):
+        """
+        Returns {path: (mtime, size, hash)} for the docs directory.
+        Files are only hashed when their mtime or size changed.
+        """
+        files = {}
+        for filename in os.listdir(config.DOCS_DIR):
+            path = os.path.join(config.DOCS_DIR, filename)
+            if not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            known = previous.get(path)
+            if known and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                files[path] = known
+            else:
+                files[path] = (stat.st_mtime_ns, stat.st_size, utils.file_hash(path))
+        return files
+
+    def check(self):
+        """Detects changed files and reloads the index if needed."""
+        self._drop_retired()
+        self._sync_persisted()
+
+        files = self._scan(self.files)
+
+        # A touched file with the same content is not a change
+        changed = [
+            path
+            for path, info in files.items()
+            if path not in self.files or self.files[path][2] != info[2]
+        ]
+        removed = [path for path in self.files if path not in files]
+
+        if changed or removed:
+            self.reload(changed, removed)
+
+        # Only once the new index is live: if the reload fails, the next poll retries it
+        self.files = files
+
+    def reload(self, changed, removed):
+        """
+        Re-chunks and re-embeds the changed files, builds a new index and swaps it in.
+        """
+        if self.verbose:
+            print(
+                f"\nHot reload: {len(changed)} changed, {len(removed)} removed file(s)..."
+            )
+
+        # 1. Re-chunk only the changed files (on a copy, committed after the swap)
+        chunks_by_file = dict(self.chunks_by_file)
+        for path in removed:
+            chunks_by_file.pop(path, None)
+        new_chunks = []
+        for path in changed:
+            chunks_by_file[path] = utils.load_and_split_file(path)
+            new_chunks.extend(chunks_by_file[path])
+
+        # 2. Reuse the embeddings of unchanged files, embed only the new chunks
+        current_index = self.pipeline.index
+        current_store = current_index.vector_store
+        stored = current_store.get(include=["embeddings", "documents", "metadatas"])
+        outdated_sources = set(changed) | set(removed)
+
+        ids, embeddings, documents, metadatas = [], [], [], []
+        outdated_ids = []
+        for i, metadata in enumerate(stored["metadatas"]):
+            if metadata.get("source") in outdated_sources:
+                outdated_ids.append(stored["ids"][i])
+                continue
+            ids.append(stored["ids"][i])
+            embeddings.append(stored["embeddings"][i])
+            documents.append(stored["documents"][i])
+            metadatas.append(metadata)
+
+        new_ids = [str(uuid.uuid4()) for _ in new_chunks]
+        new_texts = [doc.page_content for doc in new_chunks]
+        new_metadatas = [doc.metadata for doc in new_chunks]
+        new_embeddings = (
+            self.pipeline.embedding_model.embed_documents(new_texts) if new_chunks else []
+        )
+
+        # 3. Build the new structures off to the side (in-memory collection)
+        self.generation += 1
+        vector_store = Chroma(
+            collection_name=f"hot-reload-{self.generation}",
+            embedding_function=self.pipeline.embedding_model,
+        )
+        # Chroma's public API re-embeds the texts, so we add the precomputed embeddings directly
+        try:
+            if ids or new_ids:
+                vector_store._collection.add(
+                    ids=ids + new_ids,
+                    embeddings=list(embeddings) + list(new_embeddings),
+                    documents=documents + new_texts,
+                    metadatas=metadatas + new_metadatas,
+                )
+        except Exception:
+            # Do not leak the half-built collection
+            vector_store.delete_collection()
+            raise
+
+        bm25_docs = [doc for chunks in chunks_by_file.values() for doc in chunks]
+        bm25 = build_bm25(bm25_docs)
+
+        # 4. Atomic swap
+        self.pipeline.swap_index(SearchIndex(bm25_docs, bm25, vector_store))
+        self.chunks_by_file = chunks_by_file
+        if current_store is not self.persisted_store:
+            self.retired.append(current_index)
+
+        # 5. Sync the persisted store (no longer on the query path)
+        self.pending_sync.append(
+            (outdated_ids, new_ids, list(new_embeddings), new_texts, new_metadatas)
+        )
+        self._sync_persisted()
+
+        if self.verbose:
+            print(
+                f"Hot reload complete: {len(new_chunks)} chunks re-embedded, {len(bm25_docs)} chunks indexed"
+            )
+
+    def _drop_retired(self):
+        """Deletes the in-memory collections of the swapped out indexes that no query uses anymore."""
+        for index in list(self.retired):
+            if not self.pipeline.index_in_use(index):
+                index.vector_store.delete_collection()
+                self.retired.remove(index)
+
+    def _sync_persisted(self):
+        """
+        Applies the pending updates to the persisted store, so that the next session starts up to date.
+        Failed updates are kept and retried on the next poll (the live index is already up to date).
+        """
+        while self.pending_sync:
+            outdated_ids, ids, embeddings, texts, metadatas = self.pending_sync[0]
+            try:
+                if outdated_ids:
+                    self.persisted_store.delete(ids=outdated_ids)
+                if ids:
+                    # Upsert, so that a retry after a partial failure does not duplicate chunks
+                    self.persisted_store._collection.upsert(
+                        ids=ids,
+                        embeddings=embeddings,
+                        documents=texts,
+                        metadatas=metadatas,
+                    )
+            except Exception as e:
+                print(f"Persisted DB sync failed (will retry): {e}")
+                return
+            self.pending_sync.pop(0)